@@ -7,41 +7,413 @@
 #
 # Requirements: Python 3.8+, no extra pip packages needed.
 
-import argparse, json, os, threading, webbrowser
-from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
-from urllib.parse import quote
-import tempfile
+import argparse, errno, json, os, queue, re, socket, socketserver, sys, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import unquote
+
+# Optional async server: a single epoll/kqueue event loop multiplexes all the
+# small parallel chunk GETs Neuroglancer issues, instead of one OS thread per
+# connection. Falls back to the stdlib threading server if aiohttp is missing.
+try:
+    import asyncio
+    from aiohttp import web as aioweb
+except ImportError:
+    aioweb = None
+
+# orjson serializes without the Python-level encoder state machine and emits
+# compact form by default; fall back to json.dumps with explicit separators.
+try:
+    import orjson
+    def _dumps(obj):
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, separators=(",", ":"))
 
 NEUROGLANCER_DEMO = "https://neuroglancer-demo.appspot.com/#!"
 
+# Upper bound on concurrent workers for the stdlib server; overridable with
+# --threads-http. Keeps a burst of chunk requests from spawning one OS thread
+# per connection and thrashing the scheduler.
+DEFAULT_HTTP_THREADS = min(32, (os.cpu_count() or 4) * 4)
+
 running_servers = []
 
+# CORS headers precomputed once as raw bytes: one buffer append per response
+# instead of four send_header calls, each of which formats and encodes a
+# string. Chunk-heavy viewer loads issue hundreds of these responses.
+_CORS_BLOB = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Headers: Range, Content-Type\r\n"
+    b"Access-Control-Expose-Headers: Content-Length, Content-Range, Accept-Ranges\r\n"
+    b"Accept-Ranges: bytes\r\n"
+    b"Keep-Alive: timeout=5, max=1000\r\n"
+)
+_OPTIONS_BLOB = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, OPTIONS\r\n"
+    b"Access-Control-Allow-Headers: Range, Content-Type\r\n"
+)
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+# Current viewer state, served at /state.json so the demo URL can point at it
+# with ?json_url=... instead of inlining a potentially multi-hundred-KB
+# fragment that hits browser URL-length limits.
+_state_json = None
+
+def set_state_json(state_json):
+    global _state_json
+    _state_json = state_json.encode("utf-8")
+
+# Read-ahead cache for Zarr chunk files. Scanning a slice in the viewer
+# requests sibling chunks back-to-back, so after each chunk GET we prefetch
+# the next few chunks along the fastest-varying axis (the trailing index in
+# the chunk name); later requests are served straight from memory without
+# open()/stat()/sendfile syscalls.
+_CHUNK_CACHE_BYTES = 32 * 1024 * 1024
+_PREFETCH_AHEAD = 8
+_CHUNK_TAIL_RE = re.compile(r"^(.*?)(\d+)$")
+_chunk_cache = OrderedDict()  # absolute path -> file bytes
+_chunk_cache_used = 0
+_chunk_cache_lock = threading.Lock()
+_prefetch_pool = ThreadPoolExecutor(max_workers=2)
+
+def _chunk_cache_get(path):
+    global _chunk_cache_used
+    with _chunk_cache_lock:
+        data = _chunk_cache.get(path)
+        if data is not None:
+            _chunk_cache.move_to_end(path)
+        return data
+
+def _chunk_cache_put(path, data):
+    global _chunk_cache_used
+    with _chunk_cache_lock:
+        if path in _chunk_cache:
+            return
+        _chunk_cache[path] = data
+        _chunk_cache_used += len(data)
+        while _chunk_cache_used > _CHUNK_CACHE_BYTES:
+            _, evicted = _chunk_cache.popitem(last=False)
+            _chunk_cache_used -= len(evicted)
+
+def _looks_like_chunk(path):
+    base = os.path.basename(path)
+    return ".zarr" in path and not base.startswith(".") and base[-1:].isdigit()
+
+def _prefetch_siblings(path):
+    head, tail = os.path.split(path)
+    m = _CHUNK_TAIL_RE.match(tail)
+    if not m:
+        return
+    prefix, idx = m.group(1), int(m.group(2))
+    for i in range(idx + 1, idx + 1 + _PREFETCH_AHEAD):
+        sibling = os.path.join(head, f"{prefix}{i}")
+        if _chunk_cache_get(sibling) is not None:
+            continue
+        try:
+            with open(sibling, "rb") as f:
+                _chunk_cache_put(sibling, f.read())
+        except OSError:
+            break  # past the edge of the array
+
+class PooledHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    # Like ThreadingHTTPServer, but requests run on a fixed-size pool of
+    # long-lived daemon threads: excess connections queue up instead of each
+    # getting a thread, and interpreter exit never waits on a worker.
+    enable_reuseport = False  # lets several processes bind the same port
+    def __init__(self, *args, max_workers=DEFAULT_HTTP_THREADS, **kwargs):
+        self._requests = queue.Queue()
+        self._workers = []
+        for _ in range(max_workers):
+            t = threading.Thread(target=self._serve_from_queue, daemon=True)
+            t.start()
+            self._workers.append(t)
+        super().__init__(*args, **kwargs)
+    def _serve_from_queue(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            self.process_request_thread(*item)
+    def server_bind(self):
+        if self.enable_reuseport and hasattr(socket, "SO_REUSEPORT"):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+    def process_request(self, request, client_address):
+        self._requests.put((request, client_address))
+    def server_close(self):
+        super().server_close()
+        for _ in self._workers:
+            self._requests.put(None)
+
 class CORSRequestHandler(SimpleHTTPRequestHandler):
-    # Serve files from a specific directory (passed via constructor)
-    def __init__(self, *args, directory=None, **kwargs):
-        super().__init__(*args, directory=directory, **kwargs)
+    # Served basename -> real path, set by start_server. Resolving here
+    # instead of through a tempdir of symlinks avoids per-request readlink
+    # chasing in the kernel and works on Windows, where os.symlink needs
+    # admin rights.
+    path_map = {}
+    # HTTP/1.1 keeps the connection open between requests, so one socket
+    # (and one worker thread) serves a client's whole run of chunk GETs
+    # instead of paying handshake plus slow-start per request. The read
+    # timeout enforces the advertised Keep-Alive timeout=5: idle
+    # connections are dropped instead of pinning a worker in recv forever
+    # (which would also block shutdown on Ctrl+C).
+    protocol_version = "HTTP/1.1"
+    timeout = 5
+    # Chunk responses are small; Nagle plus delayed ACK can stall each one by
+    # up to ~40 ms. Disable Nagle (and delayed ACK where the platform allows)
+    # and buffer writes so each response leaves the socket in one burst.
+    wbufsize = 64 * 1024
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if hasattr(socket, "TCP_QUICKACK"):
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+    def translate_path(self, path):
+        path = path.split("?", 1)[0].split("#", 1)[0]
+        parts = [p for p in unquote(path).split("/")
+                 if p and p not in (os.curdir, os.pardir)]
+        if not parts:
+            return ""  # nothing is served at the root
+        mapped = self.path_map.get(parts[0])
+        if mapped is None:
+            return ""  # unknown top-level name -> 404 when open() fails
+        return os.path.join(mapped, *parts[1:])
     def end_headers(self):
-        # Allow cross-origin requests from any origin (needed for demo site)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Headers", "Range, Content-Type")
-        self.send_header("Access-Control-Expose-Headers", "Content-Length, Content-Range, Accept-Ranges")
-        self.send_header("Accept-Ranges", "bytes")
+        # Allow cross-origin requests from any origin (needed for demo site).
+        # HTTP/0.9 simple requests carry no headers at all (and no buffer).
+        if self.request_version != 'HTTP/0.9':
+            self._headers_buffer.append(_CORS_BLOB)
         super().end_headers()
     def do_OPTIONS(self):
-        self.send_response(204)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Range, Content-Type")
-        self.end_headers()
-
-def is_port_in_use(host, port):
-    import socket
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        return s.connect_ex((host, port)) == 0
-    
-def start_server(root_dir, host, port):
-    handler = lambda *a, **kw: CORSRequestHandler(*a, directory=root_dir, **kw)
-    httpd = ThreadingHTTPServer((host, port), handler)
+        # Preflight response written in one shot from precomputed bytes.
+        self.wfile.write(b"HTTP/1.1 204 No Content\r\n" + _OPTIONS_BLOB + b"\r\n")
+    def do_GET(self):
+        if self.path.split("?", 1)[0] == "/state.json" and _state_json is not None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(_state_json)))
+            self.end_headers()
+            self.wfile.write(_state_json)
+            return
+        if self.headers.get("Range") is None:
+            path = self.translate_path(self.path)
+            data = _chunk_cache_get(path)
+            if data is not None:
+                self.send_response(200)
+                self.send_header("Content-Type", self.guess_type(path))
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                _prefetch_pool.submit(_prefetch_siblings, path)
+                return
+            if _looks_like_chunk(path):
+                _prefetch_pool.submit(_prefetch_siblings, path)
+        super().do_GET()
+    _range = None  # (offset, count) of the current byte-range request, if any
+    def send_head(self):
+        # SimpleHTTPRequestHandler has no Range support at all, but Zarr
+        # readers request chunk files (and nii.gz) by byte range.
+        self._range = None
+        header = self.headers.get("Range")
+        m = _RANGE_RE.match(header.strip()) if header else None
+        if not m:
+            return super().send_head()
+        path = self.translate_path(self.path)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        try:
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            start = int(m.group(1)) if m.group(1) else None
+            end = int(m.group(2)) if m.group(2) else None
+            if start is None:
+                # suffix range: last N bytes
+                start = max(0, size - (end or 0))
+                end = size - 1
+            else:
+                end = size - 1 if end is None else min(end, size - 1)
+            if start >= size or start > end:
+                f.close()
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            self._range = (start, end - start + 1)
+            self.send_response(206)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+            self.end_headers()
+            f.seek(start)
+            return f
+        except Exception:
+            f.close()
+            raise
+    def copyfile(self, source, outputfile):
+        # Zero-copy path: hand the file to the kernel with sendfile instead
+        # of shuttling 16 KiB buffers through Python.
+        try:
+            in_fd = source.fileno()
+            out_fd = outputfile.fileno()
+        except (AttributeError, OSError, ValueError):
+            in_fd = out_fd = None
+        if in_fd is None or not hasattr(os, "sendfile"):
+            if self._range is not None:
+                self._copy_range(source, outputfile, self._range[1])
+            else:
+                super().copyfile(source, outputfile)
+            return
+        if self._range is not None:
+            offset, count = self._range
+        else:
+            offset = source.tell()
+            count = os.fstat(in_fd).st_size - offset
+        outputfile.flush()  # headers must hit the socket before sendfile
+        # The keep-alive read timeout puts the socket in non-blocking mode,
+        # where a full send buffer makes sendfile raise EAGAIN and truncate
+        # the response. Go blocking for the body - the kernel waits for
+        # buffer space like the pre-sendfile path did - and restore the
+        # timeout afterwards so idle connections still get reaped.
+        self.connection.settimeout(None)
+        try:
+            while count > 0:
+                sent = os.sendfile(out_fd, in_fd, offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                count -= sent
+        finally:
+            self.connection.settimeout(self.timeout)
+    @staticmethod
+    def _copy_range(source, outputfile, count, bufsize=64 * 1024):
+        while count > 0:
+            buf = source.read(min(bufsize, count))
+            if not buf:
+                break
+            outputfile.write(buf)
+            count -= len(buf)
+
+# Characters legal in a URL fragment per RFC 3986 (Neuroglancer accepts them
+# literally); everything else gets %XX-escaped. The regex scan runs in C and
+# the callback only fires for the handful of unsafe characters a JSON state
+# contains (quotes, braces, brackets), unlike urllib.parse.quote which
+# dispatches per character in Python.
+_FRAG_UNSAFE_RE = re.compile(rb"[^A-Za-z0-9\-._~!$&'()*+,;=:@/?]")
+
+# All 256 %XX escapes built once at import; the sub callback just indexes.
+_PCT_ESCAPES = [b"%%%02X" % i for i in range(256)]
+
+def _encoded_chunks(s, block=4096):
+    # Yield the percent-encoded form in blocks so callers can stream it
+    # without materializing a second full-size copy of a large state.
+    # (A str slice never splits a code point, so per-block UTF-8 is safe.)
+    for i in range(0, len(s), block):
+        yield _FRAG_UNSAFE_RE.sub(lambda m: _PCT_ESCAPES[m.group()[0]],
+                                  s[i:i + block].encode("utf-8"))
+
+def start_async_server(path_map, host, port, reuse_port=False):
+    # aiohttp path: one reactor thread handling N sockets via epoll, so chunk
+    # bursts don't pay per-request thread spawn cost or GIL ping-pong.
+    @aioweb.middleware
+    async def cors_middleware(request, handler):
+        if request.method == "OPTIONS":
+            response = aioweb.Response(status=204)
+        else:
+            try:
+                response = await handler(request)
+            except aioweb.HTTPException as exc:
+                # 404s are routine for Zarr (absent chunk = fill value);
+                # without CORS headers the browser reports them as opaque
+                # CORS failures instead of letting the viewer see the 404.
+                response = exc
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        response.headers["Access-Control-Allow-Headers"] = "Range, Content-Type"
+        response.headers["Access-Control-Expose-Headers"] = "Content-Length, Content-Range, Accept-Ranges"
+        return response
+
+    async def serve_file(request):
+        if request.match_info["path"] == "state.json" and _state_json is not None:
+            return aioweb.Response(body=_state_json, content_type="application/json")
+        parts = [p for p in request.match_info["path"].split("/")
+                 if p and p not in (os.curdir, os.pardir)]
+        mapped = path_map.get(parts[0]) if parts else None
+        if mapped is None:
+            raise aioweb.HTTPNotFound()
+        full = os.path.normpath(os.path.join(mapped, *parts[1:]))
+        if not full.startswith(mapped) or not os.path.isfile(full):
+            raise aioweb.HTTPNotFound()
+        # FileResponse handles Range requests and sets Accept-Ranges itself.
+        return aioweb.FileResponse(full)
+
+    app = aioweb.Application(middlewares=[cors_middleware])
+    app.router.add_get("/{path:.*}", serve_file)
+    loop = asyncio.new_event_loop()
+    runner = aioweb.AppRunner(app)
+
+    async def _setup():
+        await runner.setup()
+        await aioweb.TCPSite(runner, host, port, reuse_port=reuse_port or None).start()
+
+    loop.run_until_complete(_setup())
+    t = threading.Thread(target=loop.run_forever, daemon=True)
+    t.start()
+    running_servers.append((runner, loop))
+    return runner
+
+_browser = None
+
+def _open_browser(url):
+    # Resolve the browser once instead of letting webbrowser.open re-probe
+    # its candidate list on every call. An explicit $BROWSER is launched
+    # with a detached Popen so we don't block on browser startup before
+    # entering the wait loop.
+    global _browser
+    browser_env = os.environ.get("BROWSER")
+    if browser_env:
+        import subprocess
+        try:
+            subprocess.Popen([browser_env, url], start_new_session=True)
+            return
+        except OSError:
+            # $BROWSER may be a command line ("firefox -P work", "cmd %s")
+            # rather than a bare executable; webbrowser.get() knows how to
+            # interpret those.
+            pass
+    import webbrowser
+    try:
+        if _browser is None:
+            _browser = webbrowser.get()
+        _browser.open(url, new=1)
+    except webbrowser.Error:
+        # Headless box with no browser: keep serving, the printed URL can
+        # be opened elsewhere.
+        print("Could not locate a runnable browser; open the URL above manually.",
+              file=sys.stderr)
+
+def start_server(path_map, host, port, threads=DEFAULT_HTTP_THREADS, reuse_port=False):
+    # Bind directly and let EADDRINUSE tell us the port is taken: a
+    # connect-probe beforehand is both a race (the port can be grabbed in
+    # between) and an extra TCP round-trip.
+    try:
+        if aioweb is not None:
+            return start_async_server(path_map, host, port, reuse_port=reuse_port)
+        CORSRequestHandler.path_map = path_map
+        PooledHTTPServer.enable_reuseport = reuse_port
+        httpd = PooledHTTPServer((host, port), CORSRequestHandler, max_workers=threads)
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            raise SystemExit(f"Port '{port}' already in use; please select a different one.")
+        raise
     t = threading.Thread(target=httpd.serve_forever, daemon=True)
     t.start()
     running_servers.append(httpd)
@@ -49,10 +421,33 @@ def start_server(root_dir, host, port):
 
 def stop_all_servers():
     for s in running_servers:
-        s.shutdown()
-        s.server_close()
+        if isinstance(s, tuple):
+            runner, loop = s
+            asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+        else:
+            s.shutdown()
+            s.server_close()
     running_servers.clear()
 
+def _emit_state(urls, names, ftypes):
+    # Emit the state JSON directly instead of building a dict and running it
+    # through the generic json encoder; the source and name strings are
+    # user-controlled (basenames, --name, --file_type), so each goes through
+    # _dumps for escaping.
+    parts = ['{"layers":[']
+    for i, (url, name, ftype) in enumerate(zip(urls, names, ftypes)):
+        if i:
+            parts.append(",")
+        parts.append('{"type":"image","source":')
+        parts.append(_dumps(f"{ftype}://{url}"))
+        parts.append(',"name":')
+        parts.append(_dumps(name))
+        parts.append("}")
+    parts.append("]}")
+    # You can add "crossSectionScale", "position", "layout", etc., if desired.
+    return "".join(parts)
+
 def build_state(file_http_url, layer_name, file_type='zarr'):
     """
     Build a Neuroglancer state with one or more layers.
@@ -64,7 +459,7 @@ def build_state(file_http_url, layer_name, file_type='zarr'):
       - file_type: str or list of str (defaults to 'zarr' for all if single string)
 
     Returns:
-        dict: A Neuroglancer state dictionary.
+        str: The Neuroglancer state as compact JSON.
     """
     if not isinstance(file_http_url, list):
         file_http_url = [file_http_url]
@@ -79,17 +474,7 @@ def build_state(file_http_url, layer_name, file_type='zarr'):
         else:
             raise SystemError(f"Unexpected number of file_types are defined: {file_type}")
 
-    layers = [
-        {
-            "type": "image",
-            "source": f"{ftype}://{url}",
-            "name": name
-        }
-        for url, name, ftype in zip(file_http_url, layer_name, file_type)
-    ]
-    # You can add "crossSectionScale", "position", "layout", etc., if desired.
-
-    return {"layers": layers}
+    return _emit_state(file_http_url, layer_name, file_type)
 
 def main():
     ap = argparse.ArgumentParser(description="Open a local Zarr store in Neuroglancer Demo.")
@@ -98,7 +483,13 @@ def main():
     ap.add_argument("--port", type=int, default=5000, help="Port for local HTTP server (default: 5000)")
     ap.add_argument("--name", nargs='*', default=None, help="Layer names (default: basename of input file)")
     ap.add_argument("--file_type", default=None, help="file type (default: zarr)")
+    ap.add_argument("--threads-http", type=int, default=DEFAULT_HTTP_THREADS,
+                    help=f"Max worker threads for the HTTP server (default: {DEFAULT_HTTP_THREADS})")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Server processes sharing the port via SO_REUSEPORT (default: 1)")
     ap.add_argument("--no-open", action="store_true", help="Do not auto-open the browser")
+    ap.add_argument("--inline-state", action="store_true",
+                    help="Embed the state in the URL fragment instead of serving it as /state.json")
     args = ap.parse_args()
 
     file_paths = [os.path.abspath(fp.rstrip("/")) for fp in args.file_path]
@@ -111,43 +502,70 @@ def main():
                 raise SystemExit(f"Please provide paths to NIfTI files ending in .nii.gz: {fp}")
             
 
-    # Create symlinks of all input files into default root_dir
-    root_dir = tempfile.mkdtemp(prefix="zarr_server_")
-    for fp in file_paths:
-        base = os.path.basename(fp.rstrip("/"))
-        link_path = os.path.join(root_dir, base)
-        if os.path.lexists(link_path):
-            os.remove(link_path)
-        os.symlink(fp, link_path)
+    # Map served basenames to real paths; no tempdir or symlinks needed
+    path_map = {os.path.basename(fp): fp for fp in file_paths}
 
     if args.name and len(args.name) != len(file_paths):
         raise SystemExit("Number of --name arguments must match number of input files.")
     layer_names = args.name or [os.path.basename(fp) for fp in file_paths]
 
-    # 1) Start a CORS-enabled server for the parent directory
-    if not is_port_in_use(args.host, args.port):
-        httpd = start_server(root_dir, args.host, args.port)
-    else:
-        raise SystemExit(f"Port '{args.port}' already in use; please select a different one.")
-
-    # 2) Build Neuroglancer state pointing to the served Zarr
+    # 1) Build Neuroglancer state pointing to the served Zarr (before any
+    #    fork, so worker processes inherit the served /state.json too)
     file_http_urls = [f"http://{args.host}:{args.port}/{os.path.basename(fp)}/" for fp in file_paths]
     if args.file_type is not None:
-        state = build_state(file_http_urls, layer_names, file_type=args.file_type)
+        state_json = build_state(file_http_urls, layer_names, file_type=args.file_type)
     else:
-        state = build_state(file_http_urls, layer_names)
+        state_json = build_state(file_http_urls, layer_names)
+    if not args.inline_state:
+        set_state_json(state_json)
 
-    # 3) Encode the state and construct the demo URL
-    state_json = json.dumps(state, separators=(",", ":"))
-    encoded = quote(state_json, safe="")
-    url = NEUROGLANCER_DEMO + encoded
+    # 2) Start a CORS-enabled server for the input files (bind failure
+    #    reports a taken port, no racy pre-check). With --workers > 1, fork
+    #    first and have every process bind the port with SO_REUSEPORT: the
+    #    kernel shards accepted connections across them, so chunk serving
+    #    scales with cores instead of contending on one GIL.
+    worker = False
+    if args.workers > 1:
+        if not hasattr(os, "fork") or not hasattr(socket, "SO_REUSEPORT"):
+            raise SystemExit("--workers > 1 requires os.fork and SO_REUSEPORT (Linux/macOS).")
+        for _ in range(args.workers - 1):
+            if os.fork() == 0:
+                worker = True
+                break
+    httpd = start_server(path_map, args.host, args.port, threads=args.threads_http,
+                         reuse_port=args.workers > 1)
 
-    print("\nNeuroglancer Demo URL (encoded):")
-    print(url, "\n")
+    if worker:
+        # Workers only serve; the parent prints the URL and opens the browser.
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            stop_all_servers()
+        return
+
+    # 3) Link the state by URL (constant-size link, no quoting pass); with
+    #    --inline-state, fall back to streaming the encoded fragment form
+    if args.inline_state:
+        sys.stdout.write("\nNeuroglancer Demo URL (encoded):\n")
+        sys.stdout.flush()
+        out = sys.stdout.buffer
+        url_parts = [NEUROGLANCER_DEMO.encode("ascii")]
+        out.write(url_parts[0])
+        for block in _encoded_chunks(state_json):
+            out.write(block)
+            if not args.no_open:
+                url_parts.append(block)
+        out.write(b"\n\n")
+        out.flush()
+        url = None if args.no_open else b"".join(url_parts).decode("ascii")
+    else:
+        url = NEUROGLANCER_DEMO.rstrip("#!") + f"?json_url=http://{args.host}:{args.port}/state.json"
+        print("\nNeuroglancer Demo URL:")
+        print(url, "\n")
 
     # 4) Open in the default browser
     if not args.no_open:
-        webbrowser.open(url)
+        _open_browser(url)
 
     # Keep the server alive until Ctrl+C
     try: